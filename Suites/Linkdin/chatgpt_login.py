@@ -8,41 +8,125 @@ import os
 import sys
 import json
 import base64
+import struct
 import getpass
 from pathlib import Path
-from cryptography.fernet import Fernet
 import time
-from typing import Optional, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Tuple, Iterable, Iterator, Union
 
-# Selenium imports moved here for clarity
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+# Prefer the Rust-backed Fernet binding; fall back to cryptography's implementation
+try:
+    from rfernet import Fernet
+    _RFERNET = True
+except ImportError:
+    from cryptography.fernet import Fernet
+    _RFERNET = False
+
+# Selenium is imported on first browser use (see _import_selenium) so that
+# credential-only callers don't pay for the selenium/webdriver-manager import graph
+WebDriverWait = EC = chrome_driver = None
+
+# WebDriverWait poll interval in seconds (selenium's default is 0.5)
+_POLL_FREQUENCY = 0.1
+
+# Login page locators. The strategies are By.NAME ("name") and By.XPATH ("xpath")
+# spelled out, so they can live at module level without importing selenium.
+_EMAIL_FIELD = ("name", "username")
+_PASSWORD_FIELD = ("name", "password")
+_SUBMIT_BTN = ("xpath", "//button[@type='submit']")
+
+# Case-insensitive "incorrect"/"error" match, evaluated in the browser instead of
+# pulling page_source over the wire on every poll
+_LOWER = "translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+_LOGIN_ERROR_TEXT = (
+    "xpath",
+    f"//body[contains({_LOWER}, 'incorrect') or contains({_LOWER}, 'error')]"
+)
+
+# base64 of a Fernet token's b"gAAAAA" version/timestamp prefix
+_LEGACY_TOKEN_PREFIX = "Z0FBQUFB"
+
+# Plaintext bytes per Fernet token; larger stores are written as one token per line
+_CHUNK_SIZE = 64 * 1024
+
+# Prepended to each chunk's plaintext (chunk index, final-chunk flag) so that
+# dropped, reordered or truncated lines fail authentication as a whole
+_CHUNK_HEADER = struct.Struct(">I?")
+
+_NO_CREDENTIALS_ERROR = (
+    "No credentials available and stdin is not a TTY. "
+    "Set CHATGPT_EMAIL and CHATGPT_PASSWORD or save credentials first."
+)
+
+
+def _generate_key() -> bytes:
+    """Generate a urlsafe-base64 Fernet key as bytes."""
+    if _RFERNET:
+        return Fernet.generate_new_key().encode()
+    return Fernet.generate_key()
+
+
+def _make_cipher(key: bytes) -> Fernet:
+    """Build a Fernet cipher; rfernet expects the key as a str."""
+    return Fernet(key.decode()) if _RFERNET else Fernet(key)
+
+
+def _encrypt(cipher: Fernet, data: bytes) -> str:
+    """Encrypt to a Fernet token as str (rfernet returns str, cryptography bytes)."""
+    token = cipher.encrypt(data)
+    return token if isinstance(token, str) else token.decode('ascii')
+
+
+def _decrypt(cipher: Fernet, token: str) -> bytes:
+    """Decrypt a str Fernet token (rfernet rejects bytes tokens)."""
+    return cipher.decrypt(token if _RFERNET else token.encode('ascii'))
+
+
+def _import_selenium():
+    """Import selenium and the shared Chrome driver helper on first use."""
+    global WebDriverWait, EC, chrome_driver
+    if chrome_driver is not None:
+        return
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    import chrome_driver
 
 
 class SecureCredentialManager:
     """Secure credential manager for ChatGPT login."""
 
-    def __init__(self, key_file: str = ".chatgpt_key"):
-        self.key_file = Path(key_file)
-        self.credentials_file = Path(".chatgpt_credentials")
+    # Per-process caches shared by all instances so repeated constructions skip disk reads
+    _KEY_CACHE: Dict[Path, bytes] = {}
+    _CREDENTIALS_CACHE: Dict[Tuple[Path, int, bytes], Dict[str, str]] = {}
+
+    def __init__(self, key_file: Union[str, Path] = ".chatgpt_key",
+                 credentials_file: Union[str, Path] = ".chatgpt_credentials"):
+        # Resolve to absolute paths once; they double as the cache keys below
+        self.key_file = (key_file if isinstance(key_file, Path) else Path(key_file)).absolute()
+        self.credentials_file = (
+            credentials_file if isinstance(credentials_file, Path) else Path(credentials_file)
+        ).absolute()
         self.key = self._load_or_generate_key()
-        self.cipher_suite = Fernet(self.key)
+        self.cipher_suite = _make_cipher(self.key)
 
     def _load_or_generate_key(self) -> bytes:
         """Load existing key or generate a new one."""
+        cached = SecureCredentialManager._KEY_CACHE.get(self.key_file)
+        if cached is not None:
+            return cached
+
         if self.key_file.exists():
             try:
                 with open(self.key_file, 'rb') as f:
-                    return f.read()
+                    key = f.read()
+                SecureCredentialManager._KEY_CACHE[self.key_file] = key
+                return key
             except Exception as e:
                 print(f"Warning: Could not load existing key: {e}")
 
         # Generate new key
-        key = Fernet.generate_key()
+        key = _generate_key()
         try:
             with open(self.key_file, 'wb') as f:
                 f.write(key)
@@ -50,19 +134,59 @@ class SecureCredentialManager:
         except Exception as e:
             print(f"Warning: Could not save key file: {e}")
 
+        SecureCredentialManager._KEY_CACHE[self.key_file] = key
         return key
 
-    def _encrypt_credentials(self, credentials: Dict[str, str]) -> str:
-        """Encrypt credentials."""
-        json_data = json.dumps(credentials)
-        encrypted_data = self.cipher_suite.encrypt(json_data.encode())
-        return base64.b64encode(encrypted_data).decode()
-
-    def _decrypt_credentials(self, encrypted_data: str) -> Dict[str, str]:
-        """Decrypt credentials."""
-        encrypted_bytes = base64.b64decode(encrypted_data.encode())
-        decrypted_data = self.cipher_suite.decrypt(encrypted_bytes)
-        return json.loads(decrypted_data.decode())
+    def _forget_cached_credentials(self) -> None:
+        """Drop cached credentials for this manager's credentials file."""
+        for cache_key in [k for k in SecureCredentialManager._CREDENTIALS_CACHE
+                          if k[0] == self.credentials_file]:
+            del SecureCredentialManager._CREDENTIALS_CACHE[cache_key]
+
+    def _iter_encrypted_chunks(self, credentials: Dict[str, str]) -> Iterator[str]:
+        """Encrypt credentials as a stream of Fernet tokens, one per 64 KiB of JSON."""
+        buffer = bytearray()
+        index = 0
+        for fragment in json.JSONEncoder().iterencode(credentials):
+            buffer += fragment.encode()
+            # Hold a full chunk back until more data follows, so the last one can be flagged final
+            while len(buffer) > _CHUNK_SIZE:
+                # Fernet tokens are already urlsafe-base64, no extra encoding needed
+                yield _encrypt(self.cipher_suite, _CHUNK_HEADER.pack(index, False) + buffer[:_CHUNK_SIZE])
+                del buffer[:_CHUNK_SIZE]
+                index += 1
+        yield _encrypt(self.cipher_suite, _CHUNK_HEADER.pack(index, True) + buffer)
+
+    def _decrypt_token(self, token: str) -> bytes:
+        """Decrypt one stored token."""
+        # Files written by older versions wrapped the token in a second base64 layer
+        if token.startswith(_LEGACY_TOKEN_PREFIX):
+            token = base64.b64decode(token).decode('ascii')
+        return _decrypt(self.cipher_suite, token)
+
+    def _decrypt_credentials(self, tokens: Iterable[str]) -> Dict[str, str]:
+        """Decrypt credentials, rejecting missing, reordered or trailing chunks."""
+        decrypted_chunks = []
+        complete = False
+        for index, token in enumerate(tokens):
+            if complete:
+                raise ValueError("Credentials file has data after its final chunk")
+            plaintext = self._decrypt_token(token)
+
+            # Single unframed token written before chunking was introduced
+            if index == 0 and plaintext.startswith(b"{"):
+                decrypted_chunks.append(plaintext)
+                complete = True
+                continue
+
+            chunk_index, complete = _CHUNK_HEADER.unpack_from(plaintext)
+            if chunk_index != index:
+                raise ValueError("Credentials file chunks are missing or out of order")
+            decrypted_chunks.append(plaintext[_CHUNK_HEADER.size:])
+
+        if not complete:
+            raise ValueError("Credentials file is truncated")
+        return json.loads(b"".join(decrypted_chunks).decode())
 
     def save_credentials(self, email: str, password: str) -> bool:
         """Save credentials securely."""
@@ -73,10 +197,11 @@ class SecureCredentialManager:
                 'timestamp': time.time()
             }
 
-            encrypted_credentials = self._encrypt_credentials(credentials)
-
+            # Write tokens as they are produced so large stores never sit in memory twice
             with open(self.credentials_file, 'w') as f:
-                f.write(encrypted_credentials)
+                for i, token in enumerate(self._iter_encrypted_chunks(credentials)):
+                    f.write(f"\n{token}" if i else token)
+            self._forget_cached_credentials()
 
             print(f"✅ Credentials saved securely to {self.credentials_file}")
             return True
@@ -87,14 +212,23 @@ class SecureCredentialManager:
 
     def load_credentials(self) -> Optional[Dict[str, str]]:
         """Load credentials securely."""
-        if not self.credentials_file.exists():
+        try:
+            mtime_ns = self.credentials_file.stat().st_mtime_ns
+        except FileNotFoundError:
             return None
 
+        # Unchanged file and key: reuse the previously decrypted credentials
+        cache_key = (self.credentials_file, mtime_ns, self.key)
+        cached = SecureCredentialManager._CREDENTIALS_CACHE.get(cache_key)
+        if cached is not None:
+            print(f"✅ Loaded credentials for: {cached['email']}")
+            return dict(cached)
+
         try:
+            # Decrypt line by line instead of reading and splitting the whole file
             with open(self.credentials_file, 'r') as f:
-                encrypted_data = f.read().strip()
-
-            credentials = self._decrypt_credentials(encrypted_data)
+                credentials = self._decrypt_credentials(filter(None, map(str.strip, f)))
+            SecureCredentialManager._CREDENTIALS_CACHE[cache_key] = dict(credentials)
             print(f"✅ Loaded credentials for: {credentials['email']}")
             return credentials
 
@@ -105,6 +239,7 @@ class SecureCredentialManager:
     def clear_credentials(self) -> bool:
         """Clear saved credentials."""
         try:
+            self._forget_cached_credentials()
             if self.credentials_file.exists():
                 self.credentials_file.unlink()
                 print("✅ Credentials cleared")
@@ -126,13 +261,18 @@ class ChatGPTLogin:
         Get credentials from environment variables, secure storage, or user input.
         Priority: Environment Variables > Secure Storage > User Input
         """
-        # Try environment variables first
-        email = os.getenv('CHATGPT_EMAIL')
-        password = os.getenv('CHATGPT_PASSWORD')
+        return self._load_saved_credentials() or self._prompt_credentials()
 
-        if email and password:
+    def _has_env_credentials(self) -> bool:
+        """Return True if both CHATGPT_EMAIL and CHATGPT_PASSWORD are set."""
+        return bool(os.getenv('CHATGPT_EMAIL') and os.getenv('CHATGPT_PASSWORD'))
+
+    def _load_saved_credentials(self) -> Optional[Tuple[str, str]]:
+        """Get credentials from environment variables or secure storage; never prompts."""
+        # Try environment variables first
+        if self._has_env_credentials():
             print("✅ Using credentials from environment variables")
-            return email, password
+            return os.getenv('CHATGPT_EMAIL'), os.getenv('CHATGPT_PASSWORD')
 
         # Try secure storage
         credentials = self.credential_manager.load_credentials()
@@ -140,7 +280,14 @@ class ChatGPTLogin:
             print("✅ Using credentials from secure storage")
             return credentials['email'], credentials['password']
 
-        # Get from user input
+        return None
+
+    def _prompt_credentials(self) -> Tuple[str, str]:
+        """Ask the user for credentials and optionally save them."""
+        # Fail fast instead of hanging on input() in CI
+        if not sys.stdin.isatty():
+            raise RuntimeError(_NO_CREDENTIALS_ERROR)
+
         print("🔐 Please enter your ChatGPT credentials:")
         email = input("Email: ").strip()
         password = getpass.getpass("Password: ").strip()
@@ -152,44 +299,49 @@ class ChatGPTLogin:
 
         return email, password
 
+    def _click_submit(self, wait) -> None:
+        """Wait for the form's submit button to become clickable and click it."""
+        continue_button = wait.until(
+            EC.element_to_be_clickable(_SUBMIT_BTN)
+        )
+        continue_button.click()
+
     def login_to_chatgpt(self, driver, email: str, password: str) -> bool:
         """
         Login to ChatGPT using provided credentials.
         """
         try:
+            _import_selenium()
             print("🔐 Logging into ChatGPT...")
 
             # Navigate to ChatGPT login page (adjust URL if needed)
             driver.get("https://auth.openai.com/login")
 
-            wait = WebDriverWait(driver, 20)
+            # Poll every 100ms instead of the default 500ms so each step returns
+            # as soon as the element is ready
+            wait = WebDriverWait(driver, 20, poll_frequency=_POLL_FREQUENCY)
 
             # Wait for email input field by name or placeholder
-            email_input = wait.until(EC.presence_of_element_located((By.NAME, "username")))
+            email_input = wait.until(EC.presence_of_element_located(_EMAIL_FIELD))
             email_input.clear()
             email_input.send_keys(email)
 
             # Click Continue
-            continue_button = wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//button[@type='submit']"))
-            )
-            continue_button.click()
+            self._click_submit(wait)
 
             # Wait for password input
-            password_input = wait.until(EC.presence_of_element_located((By.NAME, "password")))
+            password_input = wait.until(EC.presence_of_element_located(_PASSWORD_FIELD))
             password_input.clear()
             password_input.send_keys(password)
 
             # Click Continue again
-            continue_button = wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//button[@type='submit']"))
-            )
-            continue_button.click()
+            self._click_submit(wait)
 
             # Wait for navigation or error message
-            wait.until(lambda d: "chat.openai.com/c" in d.current_url 
-                                or "incorrect" in d.page_source.lower() 
-                                or "error" in d.page_source.lower())
+            wait.until(EC.any_of(
+                EC.url_contains("chat.openai.com/c"),
+                EC.presence_of_element_located(_LOGIN_ERROR_TEXT)
+            ))
 
             if "chat.openai.com/c" in driver.current_url:
                 print("✅ Successfully logged into ChatGPT!")
@@ -204,45 +356,27 @@ class ChatGPTLogin:
 
     def setup_driver(self):
         """Setup Chrome WebDriver with proper configuration."""
-        print("Setting up Chrome WebDriver...")
-
-        options = webdriver.ChromeOptions()
-
-        # Chrome options for automation
-        options.add_argument("--start-maximized")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-gpu")
-
-        # Remove automation flags
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-
-        try:
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-
-            # Remove webdriver property to avoid detection
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            self.driver.maximize_window()
-
-            print("Chrome WebDriver setup successful!")
-            return self.driver
-
-        except Exception as e:
-            print(f"Error setting up Chrome driver: {e}")
-            raise
+        _import_selenium()
+        self.driver = chrome_driver.setup_driver()
+        return self.driver
 
     def run_login_test(self) -> bool:
         """Run the complete login test."""
         try:
-            # Setup driver
-            driver = self.setup_driver()
-
-            # Get credentials
-            email, password = self.get_credentials()
+            # Nothing to log in with and no one to ask: don't bother launching Chrome
+            if (not sys.stdin.isatty() and not self._has_env_credentials()
+                    and not self.credential_manager.credentials_file.exists()):
+                raise RuntimeError(_NO_CREDENTIALS_ERROR)
+
+            # Launching Chrome and decrypting stored credentials are independent; overlap them
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                driver_future = executor.submit(self.setup_driver)
+                credentials_future = executor.submit(self._load_saved_credentials)
+                driver = driver_future.result()
+                credentials = credentials_future.result()
+
+            # Prompt only after driver setup has finished printing
+            email, password = credentials or self._prompt_credentials()
 
             # Login to ChatGPT
             success = self.login_to_chatgpt(driver, email, password)
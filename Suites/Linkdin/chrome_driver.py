@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Shared Chrome WebDriver setup.
+Caches the resolved ChromeDriver path so repeat launches skip webdriver-manager.
+"""
+
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+_DRIVER_PATH_CACHE = Path.home() / ".cache" / "chatgpt_automation" / "driver_path.json"
+
+_HIDE_WEBDRIVER_JS = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+def _build_chrome_options() -> webdriver.ChromeOptions:
+    """Build the Chrome options shared by every driver instance."""
+    options = webdriver.ChromeOptions()
+
+    # Chrome options for automation (--start-maximized makes maximize_window() redundant)
+    options.add_argument("--start-maximized")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-gpu")
+
+    # Remove automation flags
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    return options
+
+
+_CHROME_OPTIONS = _build_chrome_options()
+
+_CHROME_VERSION_COMMANDS = [
+    ["google-chrome", "--version"],
+    ["google-chrome-stable", "--version"],
+    ["chromium", "--version"],
+    ["chromium-browser", "--version"],
+    ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome", "--version"],
+]
+
+
+def _chrome_major_version() -> Optional[str]:
+    """Return the installed Chrome major version, or None if it can't be detected."""
+    if sys.platform == "win32":
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Google\Chrome\BLBeacon") as key:
+                version, _ = winreg.QueryValueEx(key, "version")
+            return version.split(".")[0]
+        except OSError:
+            return None
+
+    for command in _CHROME_VERSION_COMMANDS:
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        match = re.search(r"(\d+)\.\d+", result.stdout)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _load_cached_driver_path(chrome_major: Optional[str]) -> Optional[str]:
+    """Return the cached driver path if it still matches the installed Chrome."""
+    if chrome_major is None:
+        return None
+    try:
+        with open(_DRIVER_PATH_CACHE, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    driver_path = cached.get("driver_path")
+    if cached.get("chrome_major_version") != chrome_major or not driver_path:
+        return None
+    driver_file = Path(driver_path)
+    if not driver_file.exists() or driver_file.stat().st_mtime != cached.get("mtime"):
+        return None
+    return driver_path
+
+
+def _save_cached_driver_path(chrome_major: Optional[str], driver_path: str) -> None:
+    """Persist the resolved driver path; failures only cost a cache miss next time."""
+    if chrome_major is None:
+        return
+    try:
+        _DRIVER_PATH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        with open(_DRIVER_PATH_CACHE, 'w') as f:
+            json.dump({
+                "chrome_major_version": chrome_major,
+                "driver_path": driver_path,
+                "mtime": Path(driver_path).stat().st_mtime,
+            }, f)
+    except OSError as e:
+        print(f"Warning: Could not cache ChromeDriver path: {e}")
+
+
+def get_driver_path() -> str:
+    """Resolve the ChromeDriver binary, using the on-disk cache when valid."""
+    chrome_major = _chrome_major_version()
+    driver_path = _load_cached_driver_path(chrome_major)
+    if driver_path:
+        return driver_path
+
+    driver_path = ChromeDriverManager().install()
+    _save_cached_driver_path(chrome_major, driver_path)
+    return driver_path
+
+
+def setup_driver():
+    """Setup Chrome WebDriver with proper configuration."""
+    print("Setting up Chrome WebDriver...")
+
+    try:
+        service = Service(get_driver_path())
+        driver = webdriver.Chrome(service=service, options=_CHROME_OPTIONS)
+
+        # Remove webdriver property to avoid detection; registered once, applies to every page
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _HIDE_WEBDRIVER_JS})
+
+        print("Chrome WebDriver setup successful!")
+        return driver
+
+    except Exception as e:
+        print(f"Error setting up Chrome driver: {e}")
+        raise
@@ -7,10 +7,26 @@ import subprocess
 import sys
 import os
 
+_PIP_INSTALL = [
+    sys.executable, "-m", "pip", "install",
+    "--no-input", "--disable-pip-version-check",
+]
+
+def install_packages(packages):
+    """Install all packages with a single pip invocation."""
+    try:
+        subprocess.check_call(_PIP_INSTALL + list(packages))
+        for package in packages:
+            print(f"✅ Successfully installed {package}")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"⚠️  Batch install failed ({e}), retrying packages individually...")
+        return False
+
 def install_package(package):
     """Install a package using pip."""
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+        subprocess.check_call(_PIP_INSTALL + [package])
         print(f"✅ Successfully installed {package}")
         return True
     except subprocess.CalledProcessError as e:
@@ -28,12 +44,17 @@ def main():
         "pytest==7.4.3"
     ]
     
-    success_count = 0
     total_packages = len(packages)
     
-    for package in packages:
-        if install_package(package):
-            success_count += 1
+    # One pip process resolves everything together; only fall back to
+    # per-package installs to pinpoint which one failed
+    if install_packages(packages):
+        success_count = total_packages
+    else:
+        success_count = 0
+        for package in packages:
+            if install_package(package):
+                success_count += 1
     
     print(f"\n📊 Installation Summary:")
     print(f"Successfully installed: {success_count}/{total_packages} packages")
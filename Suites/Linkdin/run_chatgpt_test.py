@@ -1,45 +1,11 @@
 import sys
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 
-def setup_driver():
-    """Setup Chrome WebDriver with proper configuration."""
-    print("Setting up Chrome WebDriver...")
-    
-    options = webdriver.ChromeOptions()
-    
-    # Basic Chrome options
-    options.add_argument("--start-maximized")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-gpu")
-    
-    # Remove automation flags
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    
-    try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        # Remove webdriver property to avoid detection
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        driver.maximize_window()
-        
-        print("Chrome WebDriver setup successful!")
-        return driver
-        
-    except Exception as e:
-        print(f"Error setting up Chrome driver: {e}")
-        raise
+from chrome_driver import setup_driver
 
 def test_chatgpt():
     """Test opening ChatGPT."""
@@ -6,6 +6,9 @@ This script demonstrates how to use the secure login system.
 
 import os
 import sys
+import importlib
+import importlib.util
+import tempfile
 from pathlib import Path
 
 # Add the current directory to Python path
@@ -68,11 +71,60 @@ def test_secure_login():
         print(f"❌ Test failed: {e}")
         return False
 
+def test_credentials_round_trip():
+    """Save and load credentials with every available Fernet backend."""
+    import chatgpt_login
+    
+    # rfernet is preferred when installed; hiding it forces the cryptography fallback
+    backends = ["cryptography"]
+    if importlib.util.find_spec("rfernet"):
+        backends.insert(0, "rfernet")
+    
+    original_cwd = os.getcwd()
+    try:
+        for name in backends:
+            saved_rfernet = sys.modules.get("rfernet")
+            if name != "rfernet":
+                sys.modules["rfernet"] = None
+            try:
+                module = importlib.reload(chatgpt_login)
+            finally:
+                if saved_rfernet is None:
+                    sys.modules.pop("rfernet", None)
+                else:
+                    sys.modules["rfernet"] = saved_rfernet
+            assert module._RFERNET == (name == "rfernet")
+            
+            with tempfile.TemporaryDirectory() as tmp:
+                # The credentials file lives in the working directory
+                os.chdir(tmp)
+                try:
+                    manager = module.SecureCredentialManager(os.path.join(tmp, "key"))
+                    assert manager.save_credentials("test@example.com", "testpassword123")
+                    credentials = manager.load_credentials()
+                    assert credentials and credentials['password'] == "testpassword123"
+                    
+                    # Large stores span several chunks; dropped, swapped or trailing
+                    # chunks must fail to load instead of yielding altered credentials
+                    long_password = "p" * 200_000
+                    assert manager.save_credentials("test@example.com", long_password)
+                    assert manager.load_credentials()['password'] == long_password
+                    lines = manager.credentials_file.read_text().splitlines()
+                    for tampered in (lines[:1] + lines[2:], [lines[1], lines[0]] + lines[2:], lines[:-1]):
+                        manager.credentials_file.write_text("\n".join(tampered))
+                        assert manager.load_credentials() is None
+                finally:
+                    os.chdir(original_cwd)
+            print(f"✅ Credentials round-trip with {name}")
+    finally:
+        importlib.reload(chatgpt_login)
+    return True
+
 def main():
     """Main function."""
     print("🚀 Starting Secure Login Test...")
     
-    success = test_secure_login()
+    success = test_credentials_round_trip() and test_secure_login()
     
     if success:
         print("\n🎉 All tests passed!")
@@ -1,5 +1,13 @@
 import os
-from runwayml import RunwayML, TaskFailedError
+import time
+import itertools
+from runwayml import RunwayML
+
+# Poll quickly at first so short jobs return promptly, then settle at 4s
+_POLL_DELAYS = (0.25, 0.5, 1, 2)
+_MAX_POLL_DELAY = 4
+_TASK_TIMEOUT = 600  # seconds, matches the SDK's wait_for_task_output default
+_FAILED_STATUSES = ("FAILED", "CANCELLED")
 
 def run(prompt_text, duration=5, prompt_image=None, ratio="1280:720", model="gen4_turbo"):
     client = RunwayML(api_key=os.getenv("RUNWAYML_API_SECRET"))  # Make sure API key is set
@@ -10,10 +18,16 @@ def run(prompt_text, duration=5, prompt_image=None, ratio="1280:720", model="gen
         ratio=ratio,
         duration=duration,
     )
-    try:
-        task_output = task.wait_for_task_output()
-        print("Video ready:", task_output.output[0])
-        return task_output.output[0]
-    except TaskFailedError as e:
-        print("Generation failed:", e.task_details)
-        return None
+    deadline = time.monotonic() + _TASK_TIMEOUT
+    for delay in itertools.chain(_POLL_DELAYS, itertools.repeat(_MAX_POLL_DELAY)):
+        task_output = client.tasks.retrieve(task.id)
+        if task_output.status == "SUCCEEDED":
+            print("Video ready:", task_output.output[0])
+            return task_output.output[0]
+        if task_output.status in _FAILED_STATUSES:
+            print("Generation failed:", getattr(task_output, "failure", task_output.status))
+            return None
+        if time.monotonic() + delay > deadline:
+            print("Generation timed out after", _TASK_TIMEOUT, "seconds")
+            return None
+        time.sleep(delay)
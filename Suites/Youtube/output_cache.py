@@ -0,0 +1,50 @@
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Serializes read-modify-write of the index files within this process
+_INDEX_LOCK = threading.Lock()
+
+def content_key(content: str, *params) -> str:
+    """
+    Build a cache key from the SHA-256 of the content plus the generation parameters.
+    """
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return ":".join([digest, *map(str, params)])
+
+def _read_index(index_path: Path) -> dict:
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def lookup(index_path: Path, key: str) -> Optional[Path]:
+    """
+    Return the cached output file for a key, or None if missing or deleted.
+    """
+    filename = _read_index(index_path).get(key)
+    if not filename:
+        return None
+
+    output_path = index_path.parent / filename
+    return output_path if output_path.exists() else None
+
+def store(index_path: Path, key: str, output_path: Path) -> None:
+    """
+    Record an output file for a key, replacing the index atomically.
+    """
+    with _INDEX_LOCK:
+        index = _read_index(index_path)
+        index[key] = output_path.name
+
+        tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            print(f"Warning: Could not update cache index {index_path}: {e}")
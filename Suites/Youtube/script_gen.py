@@ -1,19 +1,68 @@
-import sys
 import os
+import re
+import json
+import hashlib
 import datetime
+import functools
 from pathlib import Path
 
-# Add the parent directory to the path
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import OPENAI_API_KEY, OUTPUT_DIR
 
 try:
-    from config import OPENAI_API_KEY
     import openai
 except ImportError:
     # Fallback for missing dependencies
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     openai = None
 
+# Completion settings (part of the cache key)
+_SCRIPT_MODEL = "gpt-4o-mini"
+_SCRIPT_TEMPERATURE = 0.7
+_SCRIPT_MAX_TOKENS = 2000
+_SYSTEM_PROMPT = "You are a professional script writer specializing in YouTube content creation."
+
+# Characters dropped from topics when building filenames
+_FILENAME_SANITIZER = re.compile(r'[^\w\- ]+')
+
+# On-disk cache of completions so repeat runs skip the OpenAI round-trip
+_CACHE_DIR = OUTPUT_DIR / ".script_cache"
+
+@functools.lru_cache(maxsize=128)
+def _complete_script(prompt: str) -> str:
+    """
+    Return the completion for a prompt, served from the disk cache when available.
+    """
+    key = hashlib.sha256(json.dumps({
+        "m": _SCRIPT_MODEL,
+        "t": _SCRIPT_TEMPERATURE,
+        "max": _SCRIPT_MAX_TOKENS,
+        "s": _SYSTEM_PROMPT,
+        "p": prompt
+    }, sort_keys=True).encode()).hexdigest()
+    cache_file = _CACHE_DIR / f"{key}.txt"
+    
+    if cache_file.exists():
+        print("[SCRIPT] Using cached script for identical request")
+        return cache_file.read_text(encoding="utf-8")
+    
+    response = openai.ChatCompletion.create(
+        model=_SCRIPT_MODEL,
+        messages=[
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=_SCRIPT_MAX_TOKENS,
+        temperature=_SCRIPT_TEMPERATURE
+    )
+    script_content = response.choices[0].message.content.strip()
+    
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(script_content, encoding="utf-8")
+    except OSError as e:
+        print(f"[SCRIPT] Warning: Could not cache script: {e}")
+    
+    return script_content
+
 def generate_script(topic: str, length: str = "medium", style: str = "educational") -> Path:
     """
     Generate a script based on the provided topic, length, and style.
@@ -74,38 +123,28 @@ Avoid jargon unless necessary for the topic.
 Format the output as a clean script with clear sections."""
 
     try:
-        # Generate the script
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a professional script writer specializing in YouTube content creation."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=2000,
-            temperature=0.7
-        )
-        
-        script_content = response.choices[0].message.content.strip()
+        # Generate the script (cached by model, settings and prompt)
+        script_content = _complete_script(prompt)
         
         # Generate filename
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_topic = "".join(c for c in topic if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_topic = safe_topic.replace(' ', '_')[:30]  # Limit length
+        now = datetime.datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
+        safe_topic = _FILENAME_SANITIZER.sub('', topic).rstrip().replace(' ', '_')[:30]  # Limit length
         filename = f"script_{safe_topic}_{length}_{timestamp}.txt"
         
-        # Ensure output directory exists
-        output_dir = Path(__file__).parent.parent / "output"
-        output_dir.mkdir(exist_ok=True)
-        
         # Save the script
-        script_path = output_dir / filename
-        with open(script_path, "w", encoding="utf-8") as f:
-            f.write(f"# Script: {topic}\n")
-            f.write(f"# Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"# Length: {length_info['duration']}\n")
-            f.write(f"# Style: {style}\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(script_content)
+        script_path = OUTPUT_DIR / filename
+        header = (
+            f"# Script: {topic}\n"
+            f"# Generated: {now:%Y-%m-%d %H:%M:%S}\n"
+            f"# Length: {length_info['duration']}\n"
+            f"# Style: {style}\n"
+            f"{'=' * 50}\n\n"
+        )
+        # Written under a hidden temp name and renamed, so listings never see it half-written
+        partial_path = script_path.with_name(f".{filename}.part")
+        partial_path.write_text(header + script_content, encoding="utf-8")
+        os.replace(partial_path, script_path)
         
         print(f"[SCRIPT] Generated script saved to: {script_path}")
         return script_path
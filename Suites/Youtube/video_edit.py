@@ -1,33 +1,238 @@
-import sys
 import os
-import time
+import asyncio
 import datetime
-import requests
+import httpx
+import aiofiles
 from pathlib import Path
+from types import MappingProxyType
+from typing import AsyncIterator, Dict, Optional
 
-# Add the parent directory to the path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PIKA_API_KEY, OUTPUT_DIR
+from . import output_cache
 
-try:
-    from config import PIKA_API_KEY
-except ImportError:
-    # Fallback for missing dependencies
-    PIKA_API_KEY = os.getenv("PIKA_API_KEY")
+# Style prompts
+_STYLE_PROMPTS = MappingProxyType({
+    "modern": "modern, sleek, contemporary design, clean lines, professional",
+    "minimal": "minimalist, simple, clean, uncluttered, elegant",
+    "dynamic": "dynamic, energetic, vibrant, fast-paced, engaging",
+    "elegant": "elegant, sophisticated, refined, polished, high-quality"
+})
 
-def create_video(script_path: Path, style: str = "modern", resolution: str = "1080p") -> Path:
+# Resolution parameters
+_RES_PARAMS = MappingProxyType({
+    "720p": MappingProxyType({"width": 1280, "height": 720}),
+    "1080p": MappingProxyType({"width": 1920, "height": 1080}),
+    "4k": MappingProxyType({"width": 3840, "height": 2160})
+})
+
+_DEFAULT_STYLE = _STYLE_PROMPTS["modern"]
+_DEFAULT_RES = _RES_PARAMS["1080p"]
+
+# Shared keep-alive connection pool for Pika calls, so the status polls reuse one
+# TLS connection instead of handshaking on every request; HTTP/2 lets concurrent
+# jobs multiplex their polls over that single connection
+_PIKA_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=50)
+_PIKA_RETRIES = 3
+_PIKA_RETRY_STATUSES = (502, 503, 504)
+_PIKA_RETRY_METHODS = ("GET", "HEAD")
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+_MAX_POLL_WAIT = 300  # 5 minutes per job, measured from submission
+# API calls get a finite timeout so a hung connection can't stall polling;
+# only the video download (which can legitimately take minutes) is unbounded
+_PIKA_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+_POLL_COALESCE_WINDOW = 0.05  # polls due within 50ms of each other go out together
+
+# Maps sha256(script):style:resolution to an already rendered video in output/
+_CACHE_INDEX = OUTPUT_DIR / ".pika_cache.json"
+_PIKA_POLLER = None
+_PIKA_POLLER_LOOP = None
+
+def make_http_client() -> httpx.AsyncClient:
     """
-    Create a video from a script file using Pika Labs API.
+    Create a pooled Pika client. The server opens one at startup and shares it;
+    standalone callers get a short-lived one per create_video() call.
+    """
+    return httpx.AsyncClient(
+        timeout=_PIKA_TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(
+            http2=True, limits=_PIKA_LIMITS, retries=_PIKA_RETRIES
+        )
+    )
+
+async def _pika_request(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send a request on the pooled client, retrying gateway errors with backoff.
+    
+    Only idempotent methods are retried: a 504 on video.create can arrive after
+    Pika accepted (and billed) the job, so resending it could start a duplicate.
+    """
+    retries = _PIKA_RETRIES if method in _PIKA_RETRY_METHODS else 0
+    for attempt in range(retries + 1):
+        response = await client.request(method, url, **kwargs)
+        if response.status_code not in _PIKA_RETRY_STATUSES or attempt == retries:
+            return response
+        await asyncio.sleep(0.5 * 2 ** attempt)
+
+class _PollJob:
+    """Polling state for one submitted Pika job."""
+    
+    def __init__(self, client: httpx.AsyncClient, status_url: str, headers: Dict, due: float):
+        self.client = client
+        self.status_url = status_url
+        self.base_headers = headers
+        self.headers = dict(headers)
+        self.events = asyncio.Queue()
+        self.due = due
+        self.deadline = due + _MAX_POLL_WAIT
+        self.attempts = 0
+        self.in_flight = False
+
+class _PikaPoller:
+    """
+    Single polling loop shared by every in-flight Pika job on an event loop.
+    
+    Pika has no batch status endpoint, so each job still needs its own GET,
+    but one coroutine and one timer drive them all: polls that fall due
+    together are sent as one burst multiplexed over the shared HTTP/2
+    connection instead of N independent sleep/poll loops. Each poll runs as
+    its own task, so a slow response only delays the job it belongs to.
+    """
+    
+    def __init__(self):
+        self._jobs = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._polls = set()
+    
+    def watch(self, client: httpx.AsyncClient, video_id: str, status_url: str, headers: Dict) -> asyncio.Queue:
+        """
+        Start polling a job; its progress events and final outcome arrive on the returned queue.
+        
+        The queue yields {"status": "polling", "attempt": N} events, then either
+        {"status": "ready", "video_url": ...} or the Exception that ended the job.
+        """
+        loop = asyncio.get_running_loop()
+        job = _PollJob(client, status_url, headers, loop.time())
+        self._jobs[video_id] = job
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return job.events
+    
+    def forget(self, video_id: str) -> None:
+        """Stop polling a job whose consumer went away."""
+        self._jobs.pop(video_id, None)
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._jobs:
+            now = loop.time()
+            idle = [(video_id, job) for video_id, job in self._jobs.items() if not job.in_flight]
+            due = [(video_id, job) for video_id, job in idle
+                   if job.due <= now + _POLL_COALESCE_WINDOW]
+            if not due:
+                # Sleep until the next poll is due, or until a new job arrives
+                # or an in-flight poll completes
+                self._wakeup.clear()
+                timeout = min(job.due for _, job in idle) - now if idle else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            for video_id, job in due:
+                job.in_flight = True
+                task = loop.create_task(self._poll(video_id, job))
+                self._polls.add(task)
+                task.add_done_callback(self._polls.discard)
+    
+    async def _poll(self, video_id: str, job: _PollJob) -> None:
+        try:
+            # Conditional requests let unchanged status come back as a bodyless 304
+            try:
+                status_resp = await _pika_request(job.client, "GET", job.status_url, headers=job.headers)
+            except httpx.TimeoutException:
+                # Treat a timed-out poll like an unchanged status and back off
+                status_resp = None
+            
+            if status_resp is not None and status_resp.status_code != 304:
+                if not status_resp.is_success:
+                    raise Exception(f"Failed to check video status: {status_resp.text}")
+                
+                status_data = status_resp.json()
+                
+                if status_data.get("status") == "completed":
+                    video_url = status_data.get("video")
+                    if not video_url:
+                        raise Exception("Video completed but no URL provided")
+                    self._finish(video_id, {"status": "ready", "video_url": video_url})
+                    return
+                elif status_data.get("status") == "failed":
+                    raise Exception("Video generation failed")
+                
+                job.headers = dict(job.base_headers)
+                if status_resp.headers.get("ETag"):
+                    job.headers["If-None-Match"] = status_resp.headers["ETag"]
+                if status_resp.headers.get("Last-Modified"):
+                    job.headers["If-Modified-Since"] = status_resp.headers["Last-Modified"]
+            
+            now = asyncio.get_running_loop().time()
+            if now >= job.deadline:
+                raise Exception("Video generation timed out")
+            
+            # Exponential backoff, capped at 15s and at the remaining wait budget
+            delay = min(15, 1.5 * 1.5 ** job.attempts, job.deadline - now)
+            job.attempts += 1
+            job.due = now + delay
+            job.events.put_nowait({"status": "polling", "attempt": job.attempts})
+        except Exception as e:
+            self._finish(video_id, e)
+        finally:
+            job.in_flight = False
+            self._wakeup.set()
+    
+    def _finish(self, video_id: str, outcome) -> None:
+        job = self._jobs.pop(video_id, None)
+        if job is not None:
+            job.events.put_nowait(outcome)
+
+def _pika_poller() -> _PikaPoller:
+    """Return the shared poller for the running event loop."""
+    global _PIKA_POLLER, _PIKA_POLLER_LOOP
+    loop = asyncio.get_running_loop()
+    if _PIKA_POLLER is None or _PIKA_POLLER_LOOP is not loop:
+        _PIKA_POLLER = _PikaPoller()
+        _PIKA_POLLER_LOOP = loop
+    return _PIKA_POLLER
+
+async def iter_create_video(script_path: Path, style: str = "modern", resolution: str = "1080p",
+                            client: Optional[httpx.AsyncClient] = None,
+                            api_key: Optional[str] = None) -> AsyncIterator[Dict]:
+    """
+    Create a video from a script file using Pika Labs API, yielding progress events.
     
     Args:
         script_path (Path): Path to the script file
         style (str): Video style - "modern", "minimal", "dynamic", "elegant"
         resolution (str): Video resolution - "720p", "1080p", "4k"
+        client (httpx.AsyncClient): Shared Pika client; a temporary one is opened if omitted
+        api_key (str): Pika API key, already validated; read from config if omitted
     
-    Returns:
-        Path: Path to the generated video file
+    Yields:
+        dict: Progress events - {"status": "submitted", "job_id": ...},
+              {"status": "polling", "attempt": N} and finally
+              {"status": "done", "video_path": ...}
     """
-    if not PIKA_API_KEY:
-        raise ValueError("Pika Labs API key not found. Please set PIKA_API_KEY in config.py or environment variables.")
+    if api_key is None:
+        api_key = PIKA_API_KEY
+        if not api_key:
+            raise ValueError("Pika Labs API key not found. Please set PIKA_API_KEY in config.py or environment variables.")
+    
+    if client is None:
+        async with make_http_client() as client:
+            async for event in iter_create_video(script_path, style, resolution, client, api_key):
+                yield event
+        return
     
     if not script_path.exists():
         raise FileNotFoundError(f"Script file not found: {script_path}")
@@ -39,24 +244,17 @@ def create_video(script_path: Path, style: str = "modern", resolution: str = "10
     except Exception as e:
         raise Exception(f"Failed to read script file: {str(e)}")
     
-    # Define style prompts
-    style_prompts = {
-        "modern": "modern, sleek, contemporary design, clean lines, professional",
-        "minimal": "minimalist, simple, clean, uncluttered, elegant",
-        "dynamic": "dynamic, energetic, vibrant, fast-paced, engaging",
-        "elegant": "elegant, sophisticated, refined, polished, high-quality"
-    }
-    
-    # Define resolution parameters
-    resolution_params = {
-        "720p": {"width": 1280, "height": 720},
-        "1080p": {"width": 1920, "height": 1080},
-        "4k": {"width": 3840, "height": 2160}
-    }
+    # The same script was already rendered with these settings: skip Pika entirely
+    cache_key = output_cache.content_key(script_content, style, resolution)
+    cached_video = output_cache.lookup(_CACHE_INDEX, cache_key)
+    if cached_video:
+        print(f"♻️ Reusing previously rendered video: {cached_video}")
+        yield {"status": "done", "video_path": str(cached_video)}
+        return
     
     # Get parameters
-    style_prompt = style_prompts.get(style, style_prompts["modern"])
-    res_params = resolution_params.get(resolution, resolution_params["1080p"])
+    style_prompt = _STYLE_PROMPTS.get(style, _DEFAULT_STYLE)
+    res_params = _RES_PARAMS.get(resolution, _DEFAULT_RES)
     
     # Create the animation prompt based on script content
     # Extract key themes from the script (simplified approach)
@@ -68,7 +266,7 @@ def create_video(script_path: Path, style: str = "modern", resolution: str = "10
     try:
         # Step 1: Create video job
         create_url = "https://api.pika.art/v1/video.create"
-        headers = {"Authorization": f"Bearer {PIKA_API_KEY}"}
+        headers = {"Authorization": f"Bearer {api_key}"}
         payload = {
             "prompt": animation_prompt,
             "aspect_ratio": f"{res_params['width']}:{res_params['height']}",
@@ -77,9 +275,9 @@ def create_video(script_path: Path, style: str = "modern", resolution: str = "10
         }
         
         print("🎬 Sending request to Pika Labs...")
-        response = requests.post(create_url, headers=headers, json=payload)
+        response = await _pika_request(client, "POST", create_url, headers=headers, json=payload)
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"Failed to create video job: {response.text}")
         
         data = response.json()
@@ -88,79 +286,92 @@ def create_video(script_path: Path, style: str = "modern", resolution: str = "10
         
         video_id = data["id"]
         print(f"✅ Video job created with ID: {video_id}")
+        yield {"status": "submitted", "job_id": video_id}
         
-        # Step 2: Poll for completion
+        # Step 2: Hand the job to the shared poller and relay its progress
         status_url = f"https://api.pika.art/v1/video.get?id={video_id}"
-        video_url = None
-        max_attempts = 60  # 5 minutes with 5-second intervals
-        attempts = 0
+        poller = _pika_poller()
+        events = poller.watch(client, video_id, status_url, headers)
         
         print("⏳ Waiting for Pika Labs to finish rendering...")
-        while attempts < max_attempts:
-            status_resp = requests.get(status_url, headers=headers)
-            
-            if not status_resp.ok:
-                raise Exception(f"Failed to check video status: {status_resp.text}")
-            
-            status_data = status_resp.json()
-            
-            if status_data.get("status") == "completed":
-                video_url = status_data.get("video")
-                if video_url:
+        try:
+            while True:
+                event = await events.get()
+                if isinstance(event, Exception):
+                    raise event
+                if event["status"] == "ready":
+                    video_url = event["video_url"]
                     print("✅ Video ready!")
                     break
-                else:
-                    raise Exception("Video completed but no URL provided")
-            elif status_data.get("status") == "failed":
-                raise Exception("Video generation failed")
-            
-            attempts += 1
-            time.sleep(5)
-        
-        if not video_url:
-            raise Exception("Video generation timed out")
-        
-        # Step 3: Download the video
-        print("⬇ Downloading video...")
-        video_resp = requests.get(video_url)
-        
-        if not video_resp.ok:
-            raise Exception(f"Failed to download video: {video_resp.status_code}")
+                yield event
+        finally:
+            poller.forget(video_id)
         
         # Generate filename
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         script_name = script_path.stem
         filename = f"video_{script_name}_{style}_{resolution}_{timestamp}.mp4"
         
-        # Ensure output directory exists
-        output_dir = Path(__file__).parent.parent / "output"
-        output_dir.mkdir(exist_ok=True)
-        
-        # Save the video file
-        video_path = output_dir / filename
-        with open(video_path, "wb") as f:
-            f.write(video_resp.content)
+        # Step 3: Stream the video to disk in 1 MiB chunks instead of buffering it in memory
+        # (result URLs are often signed storage links that redirect, which httpx won't follow by default)
+        print("⬇ Downloading video...")
+        video_path = OUTPUT_DIR / filename
+        # Dot-prefixed so /list_outputs/ and /output/ skip it while the download runs
+        partial_path = video_path.with_name(f".{filename}.part")
+        try:
+            async with client.stream("GET", video_url, timeout=None, follow_redirects=True) as video_resp:
+                if not video_resp.is_success:
+                    raise Exception(f"Failed to download video: {video_resp.status_code}")
+                
+                async with aiofiles.open(partial_path, "wb") as f:
+                    async for chunk in video_resp.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                        await f.write(chunk)
+            os.replace(partial_path, video_path)
+        finally:
+            if partial_path.exists():
+                partial_path.unlink()
         
+        output_cache.store(_CACHE_INDEX, cache_key, video_path)
         print(f"🎉 Video saved as {video_path}")
-        return video_path
+        yield {"status": "done", "video_path": str(video_path)}
         
     except Exception as e:
         raise Exception(f"Failed to create video: {str(e)}")
 
+async def create_video(script_path: Path, style: str = "modern", resolution: str = "1080p",
+                       client: Optional[httpx.AsyncClient] = None,
+                       api_key: Optional[str] = None) -> Path:
+    """
+    Create a video from a script file using Pika Labs API.
+    
+    Args:
+        script_path (Path): Path to the script file
+        style (str): Video style - "modern", "minimal", "dynamic", "elegant"
+        resolution (str): Video resolution - "720p", "1080p", "4k"
+        client (httpx.AsyncClient): Shared Pika client; a temporary one is opened if omitted
+        api_key (str): Pika API key, already validated; read from config if omitted
+    
+    Returns:
+        Path: Path to the generated video file
+    """
+    async for event in iter_create_video(script_path, style, resolution, client, api_key):
+        if event["status"] == "done":
+            return Path(event["video_path"])
+    raise Exception("Failed to create video: no result produced")
+
 def run(script_file=None, style="modern", resolution="1080p"):
     """
     Legacy function for backward compatibility.
     """
     if script_file is None:
         # Use a default script or create one
-        script_file = Path(__file__).parent.parent / "output" / "default_script.txt"
+        script_file = OUTPUT_DIR / "default_script.txt"
         if not script_file.exists():
             # Create a simple default script
-            script_file.parent.mkdir(exist_ok=True)
             with open(script_file, "w") as f:
                 f.write("This is a default script for video generation.")
     
     if isinstance(script_file, str):
         script_file = Path(script_file)
     
-    return create_video(script_file, style, resolution)
+    return asyncio.run(create_video(script_file, style, resolution))
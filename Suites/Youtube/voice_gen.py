@@ -1,21 +1,45 @@
-import sys
 import os
+import re
 import datetime
 from pathlib import Path
+from types import MappingProxyType
+from typing import Optional
 
-# Add the parent directory to the path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ELEVENLABS_API_KEY, OUTPUT_DIR
+from . import output_cache
 
 try:
-    from config import ELEVENLABS_API_KEY
     from elevenlabs import generate, set_api_key
 except ImportError:
     # Fallback for missing dependencies
-    ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
     generate = None
     set_api_key = None
 
-def generate_voice(text: str, voice_type: str = "female", speed: str = "normal") -> Path:
+# Voice IDs (you can customize these)
+_VOICE_IDS = MappingProxyType({
+    "male": "21m00Tcm4TlvDq8ikWAM",  # Josh
+    "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel
+    "neutral": "21m00Tcm4TlvDq8ikWAM"  # Default
+})
+
+# Speed parameters
+_SPEED_PARAMS = MappingProxyType({
+    "slow": 0.8,
+    "normal": 1.0,
+    "fast": 1.2
+})
+
+_DEFAULT_VOICE_ID = _VOICE_IDS["female"]
+_DEFAULT_SPEED = _SPEED_PARAMS["normal"]
+
+# Characters dropped from the text when building filenames
+_FILENAME_SANITIZER = re.compile(r'[^\w\- ]+')
+
+# Maps sha256(text):voice_type:speed to an already generated audio file in output/
+_CACHE_INDEX = OUTPUT_DIR / ".voice_cache.json"
+
+def generate_voice(text: str, voice_type: str = "female", speed: str = "normal",
+                   api_key: Optional[str] = None) -> Path:
     """
     Generate voice from text using ElevenLabs API.
     
@@ -23,36 +47,32 @@ def generate_voice(text: str, voice_type: str = "female", speed: str = "normal")
         text (str): Text to convert to speech
         voice_type (str): Voice type - "male", "female", "neutral"
         speed (str): Speaking speed - "slow", "normal", "fast"
+        api_key (str): ElevenLabs API key, already validated; read from config if omitted
     
     Returns:
         Path: Path to the generated audio file
     """
-    if not ELEVENLABS_API_KEY:
-        raise ValueError("ElevenLabs API key not found. Please set ELEVENLABS_API_KEY in config.py or environment variables.")
+    if api_key is None:
+        api_key = ELEVENLABS_API_KEY
+        if not api_key:
+            raise ValueError("ElevenLabs API key not found. Please set ELEVENLABS_API_KEY in config.py or environment variables.")
     
     if not generate or not set_api_key:
         raise ImportError("ElevenLabs library not installed. Please install it with: pip install elevenlabs")
     
-    # Configure ElevenLabs
-    set_api_key(ELEVENLABS_API_KEY)
-    
-    # Define voice IDs (you can customize these)
-    voice_ids = {
-        "male": "21m00Tcm4TlvDq8ikWAM",  # Josh
-        "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel
-        "neutral": "21m00Tcm4TlvDq8ikWAM"  # Default
-    }
+    # The same text was already voiced with these settings: skip ElevenLabs entirely
+    cache_key = output_cache.content_key(text, voice_type, speed)
+    cached_audio = output_cache.lookup(_CACHE_INDEX, cache_key)
+    if cached_audio:
+        print(f"[VOICE] Reusing previously generated voice: {cached_audio}")
+        return cached_audio
     
-    # Define speed parameters
-    speed_params = {
-        "slow": 0.8,
-        "normal": 1.0,
-        "fast": 1.2
-    }
+    # Configure ElevenLabs
+    set_api_key(api_key)
     
     # Get parameters
-    voice_id = voice_ids.get(voice_type, voice_ids["female"])
-    speed_value = speed_params.get(speed, speed_params["normal"])
+    voice_id = _VOICE_IDS.get(voice_type, _DEFAULT_VOICE_ID)
+    speed_value = _SPEED_PARAMS.get(speed, _DEFAULT_SPEED)
     
     try:
         # Generate the audio
@@ -64,20 +84,23 @@ def generate_voice(text: str, voice_type: str = "female", speed: str = "normal")
         
         # Generate filename
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_text = "".join(c for c in text[:30] if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_text = safe_text.replace(' ', '_')[:20]  # Limit length
+        safe_text = _FILENAME_SANITIZER.sub('', text[:30]).rstrip().replace(' ', '_')[:20]  # Limit length
         filename = f"voice_{safe_text}_{voice_type}_{timestamp}.mp3"
         
-        # Ensure output directory exists
-        output_dir = Path(__file__).parent.parent / "output"
-        output_dir.mkdir(exist_ok=True)
-        
-        # Save the audio file
-        audio_path = output_dir / filename
-        with open(audio_path, "wb") as f:
-            for chunk in audio:
-                f.write(chunk)
+        # Save the audio file under a hidden temp name and rename it into place,
+        # so the output listing never sees a half-written file
+        audio_path = OUTPUT_DIR / filename
+        partial_path = audio_path.with_name(f".{filename}.part")
+        try:
+            with open(partial_path, "wb") as f:
+                for chunk in audio:
+                    f.write(chunk)
+            os.replace(partial_path, audio_path)
+        finally:
+            if partial_path.exists():
+                partial_path.unlink()
         
+        output_cache.store(_CACHE_INDEX, cache_key, audio_path)
         print(f"[VOICE] Generated voice saved to: {audio_path}")
         return audio_path
         
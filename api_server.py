@@ -1,56 +1,80 @@
 import sys
 import os
 import json
-import uuid
+import itertools
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Optional, List
 from datetime import datetime
 
-# Add the parent directory to the path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
 import uvicorn
+import aiofiles
+
+from config import CORS_ORIGINS, DEBUG, ELEVENLABS_API_KEY, FRONTEND_DIR, OUTPUT_DIR, PIKA_API_KEY
+from Suites.Youtube import script_gen, voice_gen, video_edit
 
-# Import stage modules
-try:
-    from ai_video_pipeline.stages import script_gen, voice_gen, video_edit, animation_gen
-except ImportError:
-    # Fallback for direct imports
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from stages import script_gen, voice_gen, video_edit, animation_gen
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Validate API keys once at startup and own the shared Pika client.
+    
+    The server refuses to start when a key is missing instead of failing
+    the first voice/video request with a 500.
+    """
+    missing_keys = [name for name, value in (("PIKA_API_KEY", PIKA_API_KEY),
+                                             ("ELEVENLABS_API_KEY", ELEVENLABS_API_KEY)) if not value]
+    if missing_keys:
+        raise RuntimeError(f"Missing required API keys: {', '.join(missing_keys)}")
+    
+    app.state.pika_key = PIKA_API_KEY
+    app.state.elevenlabs_key = ELEVENLABS_API_KEY
+    app.state.http = video_edit.make_http_client()
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Video Pipeline API",
     description="API for generating scripts, voices, and videos using AI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Add CORS middleware
+# Add CORS middleware (browsers reject "*" origins with credentials); preflight
+# responses are cacheable for a day
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure this properly for production
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
-# Directory setup
-BASE_DIR = Path(__file__).parent
-FRONTEND_DIR = BASE_DIR / "frontend"
-OUTPUT_DIR = BASE_DIR / "output"
+# Bound concurrent Pika/ElevenLabs jobs to the API quota; requests beyond the
+# limit get 429 instead of queueing up behind minutes-long renders. The counts
+# live in this process, so the server runs a single (async) worker: more
+# workers would multiply the cap and /health would only see its own worker
+MAX_CONCURRENT_VIDEO_JOBS = 4
+MAX_CONCURRENT_VOICE_JOBS = 4
+_MAX_JOBS = {"video": MAX_CONCURRENT_VIDEO_JOBS, "voice": MAX_CONCURRENT_VOICE_JOBS}
+_ACTIVE_JOBS = {"video": 0, "voice": 0}
 
-# Ensure output directory exists
-OUTPUT_DIR.mkdir(exist_ok=True)
+# resolve() walks every path component, so do it once for the output root
+_OUTPUT_DIR_RESOLVED = OUTPUT_DIR.resolve()
 
 # Mount static files
 app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
-app.mount("/output", StaticFiles(directory=OUTPUT_DIR), name="output")
 
 # Pydantic models for request/response
 class ScriptRequest(BaseModel):
@@ -74,20 +98,68 @@ class APIResponse(BaseModel):
     data: Optional[dict] = None
 
 # Utility functions
+# Process id + per-process counter keeps names unique across workers without
+# reading the system RNG for every upload
+_FILENAME_COUNTER = itertools.count()
+_PID = os.getpid()
+
 def generate_unique_filename(prefix: str, extension: str) -> str:
-    """Generate a unique filename with timestamp and UUID."""
+    """Generate a unique filename with timestamp, process id and counter."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    unique_id = str(uuid.uuid4())[:8]
-    return f"{prefix}_{timestamp}_{unique_id}.{extension}"
+    return f"{prefix}_{timestamp}_{_PID}_{next(_FILENAME_COUNTER):08x}.{extension}"
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
 
-def save_uploaded_file(upload_file: UploadFile, directory: Path) -> Path:
-    """Save an uploaded file and return the path."""
+async def save_uploaded_file(upload_file: UploadFile, directory: Path) -> Path:
+    """Save an uploaded file in chunks without blocking the event loop and return the path."""
     filename = generate_unique_filename("upload", upload_file.filename.split('.')[-1])
     file_path = directory / filename
     
-    with open(file_path, "wb") as buffer:
-        content = upload_file.file.read()
-        buffer.write(content)
+    # Write under a hidden temp name and rename into place, so /list_outputs/
+    # never caches a half-written upload
+    partial_path = directory / f".{filename}.part"
+    try:
+        async with aiofiles.open(partial_path, "wb") as buffer:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                await buffer.write(chunk)
+        os.replace(partial_path, file_path)
+    finally:
+        if partial_path.exists():
+            partial_path.unlink()
+    
+    return file_path
+
+def claim_job_slot(kind: str) -> Callable[[], None]:
+    """
+    Claim a concurrency slot for a job kind, or reject with 429 if all are taken.
+    
+    The check and the claim happen with no await in between, so concurrent
+    requests can't all pass the check before any of them holds a slot.
+    Returns a release function that is safe to call more than once.
+    """
+    if _ACTIVE_JOBS[kind] >= _MAX_JOBS[kind]:
+        raise HTTPException(status_code=429, detail=f"Server busy: too many concurrent {kind} jobs")
+    _ACTIVE_JOBS[kind] += 1
+    
+    released = False
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            _ACTIVE_JOBS[kind] -= 1
+    return release
+
+def resolve_output_path(filename: str) -> Path:
+    """
+    Resolve a user-supplied filename inside the output directory, rejecting traversal.
+    """
+    # Obvious traversal attempts never reach the filesystem
+    if "/" in filename or "\\" in filename or ".." in filename:
+        raise HTTPException(status_code=400, detail="Invalid file path")
+    
+    file_path = (OUTPUT_DIR / filename).resolve()
+    if not file_path.is_relative_to(_OUTPUT_DIR_RESOLVED):
+        raise HTTPException(status_code=400, detail="Invalid file path")
     
     return file_path
 
@@ -97,10 +169,29 @@ async def index():
     """Serve the main application page."""
     return FileResponse(FRONTEND_DIR / "index.html")
 
+# HEAD too: media players and download managers probe files before fetching them
+@app.api_route("/output/{name}", methods=["GET", "HEAD"])
+async def get_output(name: str):
+    """
+    Serve a generated file; FileResponse hands the body to sendfile() where available.
+    """
+    file_path = resolve_output_path(name)
+    
+    # Dotfiles are the stages' cache indexes, not user-facing outputs
+    if name.startswith(".") or not file_path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    return FileResponse(file_path)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "active_jobs": dict(_ACTIVE_JOBS),
+        "max_jobs": {"video": MAX_CONCURRENT_VIDEO_JOBS, "voice": MAX_CONCURRENT_VOICE_JOBS}
+    }
 
 @app.post("/generate_script/", response_model=APIResponse)
 async def generate_script_endpoint(request: ScriptRequest):
@@ -127,8 +218,8 @@ async def generate_script_endpoint(request: ScriptRequest):
         
         # Read script content for response
         try:
-            with open(script_path, 'r', encoding='utf-8') as f:
-                script_content = f.read()
+            async with aiofiles.open(script_path, 'r', encoding='utf-8') as f:
+                script_content = await f.read()
         except Exception as e:
             script_content = f"Script generated but content could not be read: {str(e)}"
         
@@ -150,6 +241,8 @@ async def generate_voice_endpoint(request: VoiceRequest):
     """
     Generate voice from text using AI voice synthesis.
     """
+    release_slot = claim_job_slot("voice")
+    
     try:
         # Validate input
         if not request.text.strip():
@@ -158,11 +251,14 @@ async def generate_voice_endpoint(request: VoiceRequest):
         if len(request.text) > 5000:
             raise HTTPException(status_code=400, detail="Text too long (max 5000 characters)")
         
-        # Generate voice using the voice_gen module
-        voice_path = voice_gen.generate_voice(
+        # Generate voice using the voice_gen module; the SDK call blocks, so run it
+        # in a worker thread to keep the event loop free while the slot is held
+        voice_path = await asyncio.to_thread(
+            voice_gen.generate_voice,
             text=request.text,
             voice_type=request.voice_type,
-            speed=request.speed
+            speed=request.speed,
+            api_key=app.state.elevenlabs_key
         )
         
         # Convert to relative path for frontend
@@ -183,8 +279,14 @@ async def generate_voice_endpoint(request: VoiceRequest):
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate voice: {str(e)}")
+    finally:
+        release_slot()
+
+def _sse_event(payload: dict) -> str:
+    """Format a payload as a Server-Sent Events data line."""
+    return f"data: {json.dumps(payload)}\n\n"
 
-@app.post("/create_video/", response_model=APIResponse)
+@app.post("/create_video/")
 async def create_video_endpoint(
     script_file: UploadFile = File(...),
     style: str = Form("modern"),
@@ -192,6 +294,10 @@ async def create_video_endpoint(
 ):
     """
     Create a video from a script file.
+    
+    Progress is streamed as Server-Sent Events while Pika Labs renders:
+    {"status": "polling", "attempt": N} lines followed by a final
+    {"status": "done", ...} or {"status": "error", ...} event.
     """
     try:
         # Validate file
@@ -207,38 +313,54 @@ async def create_video_endpoint(
                 detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
             )
         
-        # Save uploaded file
-        script_path = save_uploaded_file(script_file, OUTPUT_DIR)
+        # Claim the slot before the first await; it is held until the stream ends
+        release_slot = claim_job_slot("video")
         
-        # Generate video using the video_edit module
-        video_path = video_edit.create_video(
-            script_path=script_path,
-            style=style,
-            resolution=resolution
-        )
-        
-        # Convert to relative path for frontend
-        if isinstance(video_path, str):
-            video_path = Path(video_path)
-        
-        relative_path = f"/output/{video_path.name}"
-        
-        # Get file size
-        file_size = video_path.stat().st_size if video_path.exists() else 0
-        
-        return APIResponse(
-            status="success",
-            message="Video created successfully",
-            data={
-                "video_path": relative_path,
-                "filename": video_path.name,
-                "size": f"{file_size / (1024*1024):.1f} MB",
-                "duration": "Unknown"  # Could be extracted if needed
-            }
-        )
+        # Save uploaded file
+        try:
+            script_path = await save_uploaded_file(script_file, OUTPUT_DIR)
+        except BaseException:
+            release_slot()
+            raise
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create video: {str(e)}")
+    
+    async def event_stream():
+        try:
+            # Generate video using the video_edit module
+            async for event in video_edit.iter_create_video(
+                script_path=script_path,
+                style=style,
+                resolution=resolution,
+                client=app.state.http,
+                api_key=app.state.pika_key
+            ):
+                if event["status"] != "done":
+                    yield _sse_event(event)
+                    continue
+                
+                # Convert to relative path for frontend
+                video_path = Path(event["video_path"])
+                file_size = video_path.stat().st_size if video_path.exists() else 0
+                yield _sse_event({
+                    "status": "done",
+                    "message": "Video created successfully",
+                    "video_path": f"/output/{video_path.name}",
+                    "filename": video_path.name,
+                    "size": f"{file_size / (1024*1024):.1f} MB",
+                    "duration": "Unknown"  # Could be extracted if needed
+                })
+        except Exception as e:
+            yield _sse_event({"status": "error", "message": f"Failed to create video: {str(e)}"})
+        finally:
+            release_slot()
+    
+    # The background task covers a client that disconnects before the stream starts
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             background=BackgroundTask(release_slot))
 
 @app.post("/upload_script/", response_model=APIResponse)
 async def upload_script_endpoint(script_file: UploadFile = File(...)):
@@ -260,7 +382,7 @@ async def upload_script_endpoint(script_file: UploadFile = File(...)):
             )
         
         # Save uploaded file
-        script_path = save_uploaded_file(script_file, OUTPUT_DIR)
+        script_path = await save_uploaded_file(script_file, OUTPUT_DIR)
         
         return APIResponse(
             status="success",
@@ -274,27 +396,44 @@ async def upload_script_endpoint(script_file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload script: {str(e)}")
 
+# Last /list_outputs/ response, reused until the output directory's mtime changes
+_LIST_CACHE = {"mtime": None, "payload": None}
+
 @app.get("/list_outputs/")
 async def list_outputs():
     """
     List all generated files in the output directory.
     """
     try:
+        # Adding, removing or renaming a file bumps the directory mtime
+        dir_mtime = OUTPUT_DIR.stat().st_mtime_ns
+        if dir_mtime == _LIST_CACHE["mtime"]:
+            return _LIST_CACHE["payload"]
+        
         files = []
-        for file_path in OUTPUT_DIR.iterdir():
-            if file_path.is_file():
+        # scandir entries carry the file type from the directory read itself
+        with os.scandir(OUTPUT_DIR) as entries:
+            for entry in entries:
+                # Dotfiles are the stages' cache indexes, not user-facing outputs
+                if not entry.is_file(follow_symlinks=False) or entry.name.startswith("."):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                suffix = Path(entry.name).suffix
                 files.append({
-                    "name": file_path.name,
-                    "size": f"{file_path.stat().st_size / 1024:.1f} KB",
-                    "modified": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-                    "type": file_path.suffix[1:] if file_path.suffix else "unknown"
+                    "name": entry.name,
+                    "size": f"{stat.st_size / 1024:.1f} KB",
+                    "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                    "type": suffix[1:] if suffix else "unknown"
                 })
         
-        return APIResponse(
+        payload = APIResponse(
             status="success",
             message=f"Found {len(files)} files",
             data={"files": files}
         )
+        _LIST_CACHE["mtime"] = dir_mtime
+        _LIST_CACHE["payload"] = payload
+        return payload
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list outputs: {str(e)}")
@@ -305,11 +444,8 @@ async def delete_file(filename: str):
     Delete a file from the output directory.
     """
     try:
-        file_path = OUTPUT_DIR / filename
-        
         # Security check - ensure file is in output directory
-        if not file_path.resolve().is_relative_to(OUTPUT_DIR.resolve()):
-            raise HTTPException(status_code=400, detail="Invalid file path")
+        file_path = resolve_output_path(filename)
         
         if not file_path.exists():
             raise HTTPException(status_code=404, detail="File not found")
@@ -321,13 +457,15 @@ async def delete_file(filename: str):
             message=f"File {filename} deleted successfully"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete file: {str(e)}")
 
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "status": "error",
@@ -338,7 +476,7 @@ async def http_exception_handler(request, exc):
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "status": "error",
@@ -349,10 +487,15 @@ async def general_exception_handler(request, exc):
     )
 
 if __name__ == "__main__":
+    # uvloop/httptools come with uvicorn[standard] (uvloop is unavailable on Windows).
+    # One worker: the endpoints are I/O-bound, and the job limits, the shared Pika
+    # poller and its connection pool are all per process.
     uvicorn.run(
         "api_server:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        reload=DEBUG,
         log_level="info"
     )
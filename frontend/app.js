@@ -258,10 +258,11 @@ async function handleVideoSubmit(e) {
 
         if (!response.ok) {
             const error = await response.json();
-            throw new Error(error.detail || "Unknown error occurred");
+            throw new Error(error.detail || error.message || "Unknown error occurred");
         }
 
-        const data = await response.json();
+        // The server streams progress as Server-Sent Events until the render finishes
+        const data = await readVideoEvents(response);
         videoOutput.textContent = `✅ Video created successfully!\n\nFile: ${data.video_path}\nDuration: ${data.duration || 'Unknown'}\nSize: ${data.size || 'Unknown'}`;
         showToast('Video created successfully!', 'success');
 
@@ -273,6 +274,32 @@ async function handleVideoSubmit(e) {
     }
 }
 
+// Read the /create_video/ event stream, updating progress, and return the final event
+async function readVideoEvents(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const raw of events) {
+            if (!raw.startsWith('data: ')) continue;
+            const event = JSON.parse(raw.slice(6));
+            if (event.status === 'done') return event;
+            if (event.status === 'error') throw new Error(event.message);
+            if (event.status === 'polling') {
+                videoOutput.textContent = `⏳ Rendering video… (check ${event.attempt})`;
+            }
+        }
+    }
+    throw new Error('Video stream ended unexpectedly');
+}
+
 // Utility functions
 function showLoading(show) {
     if (show) {
@@ -1,9 +1,16 @@
-from stages import script_gen, voice_gen, animation_gen, video_edit, upload_youtube
+from concurrent.futures import ProcessPoolExecutor
+
+from Suites.Youtube import script_gen, voice_gen, animation_gen, video_edit, upload_youtube
 
 def main():
     script_file = script_gen.run(theme="motivation")   # Step 1
-    audio_file = voice_gen.run(script_file)            # Step 2
-    video_file = animation_gen.run(script_file)        # Step 3
+
+    # Steps 2 and 3 both only need the script, so run them side by side
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        voice_future = pool.submit(voice_gen.run, script_file)        # Step 2
+        anim_future = pool.submit(animation_gen.run, script_file)     # Step 3
+        audio_file, video_file = voice_future.result(), anim_future.result()
+
     final_video = video_edit.run(video_file, audio_file)  # Step 4
     upload_youtube.run(final_video)                    # Step 5
 